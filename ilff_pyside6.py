@@ -1,29 +1,138 @@
 import sys
+import hashlib
+import logging
+import mmap
 import struct
-from PIL import Image
-from PIL.ImageQt import ImageQt
+import numpy as np
 import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QListWidget, QVBoxLayout, QHBoxLayout,
     QFileDialog, QMessageBox, QCheckBox, QFrame, QSizePolicy, QStatusBar,
-    QTextEdit, QDockWidget
+    QPlainTextEdit, QDockWidget
 )
 from PySide6.QtGui import (
-    QPixmap, QPalette, QColor, QFont, QFontDatabase, QAction
+    QPixmap, QImage, QIcon, QPalette, QColor, QFont, QFontDatabase, QAction
 )
-from PySide6.QtCore import Qt, QObject, Signal
+from PySide6.QtCore import (
+    Qt, QObject, Signal, QTimer, QSize, QStandardPaths, QRunnable, QThreadPool
+)
+
+log = logging.getLogger(__name__)
+
+# precompiled little-endian layouts for the ILFF file header, chunk headers, the TEX header
+# and the 18 byte TGA header shared by the tga reader and the export writer
+_FILE_HDR = struct.Struct('<IIIII')
+_CHUNK_HDR = struct.Struct('<IIII')
+_TEX_HDR = struct.Struct('<IIIIIHHHHHH')
+_TGA_HDR = struct.Struct('<BBBHHBHHHHBB')
+
+# number of decoded textures kept around while browsing
+_DECODE_CACHE_SIZE = 32
+
+# bytes of scratch buffers each decode all worker may keep between tasks
+_DECODE_POOL_BYTES = 32 * 1024 * 1024
+
+# edge length of the list widget thumbnails
+_THUMB_SIZE = 64
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, numpy path is used without it
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True, boundscheck=False, nogil=True)
+    def _expand_bgr_to_bgra(src, dst):
+        # jit compiled 24 -> 32 bpp expansion, alpha set to opaque. runs without the
+        # gil so decode all workers expand in parallel
+        for i in range(src.size // 3):
+            j = i * 4
+            k = i * 3
+            dst[j] = src[k]
+            dst[j + 1] = src[k + 1]
+            dst[j + 2] = src[k + 2]
+            dst[j + 3] = 255
+else:
+    _expand_bgr_to_bgra = None
 
 
 class EmittingStream(QObject):
     text_written = Signal(str)
+    _schedule = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # writes are buffered and handed to the console in one batch every 30 ms
+        self._chunks = []
+        self._lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(30)
+        self._timer.timeout.connect(self._drain)
+        # queued onto the gui thread when written from a decode worker
+        self._schedule.connect(self._timer.start)
 
     def write(self, text):
-        self.text_written.emit(str(text))
+        with self._lock:
+            first = not self._chunks
+            self._chunks.append(str(text))
+        if first:
+            self._schedule.emit()
 
     def flush(self):
         pass
 
+    def _drain(self):
+        with self._lock:
+            text = ''.join(self._chunks)
+            self._chunks.clear()
+        if text:
+            self.text_written.emit(text)
+
+
+class QtLogHandler(logging.Handler):
+    """Forwards log records to the debug console, only installed while it is open."""
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream  # EmittingStream, safe to write from worker threads
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+
+class DecodeSignals(QObject):
+    # generation, index, decoded image (null QImage on failure)
+    finished = Signal(int, int, QImage)
+
+
+class DecodeTask(QRunnable):
+    """Decodes one texture on a pool thread and hands a QImage back to the gui thread."""
+
+    def __init__(self, viewer, generation, index):
+        super().__init__()
+        self.viewer = viewer
+        self.generation = generation
+        self.index = index
+        self.signals = DecodeSignals()
+
+    def run(self):
+        # QPixmap may only be built on the gui thread, so stop at the QImage
+        qimg = self.viewer.decode_chunk(self.index, pooled=True)
+        if qimg is None:
+            qimg = QImage()
+        else:
+            self.viewer.write_thumbnail(self.index, qimg)
+        self.signals.finished.emit(self.generation, self.index, qimg)
+
 
 class ImageLabel(QLabel):
     def __init__(self, parent=None):
@@ -43,13 +152,34 @@ class ImageViewer(QMainWindow):
 
         # instance vars
         self.zoom_level = 1.0
-        self.current_image = None  # pil img
+        self.current_image = None  # decoded QPixmap
+        self.current_index = -1  # list row of current_image
         self.current_image_name = None
         self.current_image_size = 0  # size in bytes
-        self.images = []  # list of tuples (pil image, name, size_in_bytes)
+        # texture descriptors, stored as parallel lists indexed by list row
+        self._image_offsets = []  # offset of each BODY payload in the mmap
+        self._image_names = []
+        self._image_sizes = []  # size in bytes
+        self._mm = None  # mmap of the open .res file, kept alive for lazy decoding
+        self._decoded = OrderedDict()  # lru cache of index -> QPixmap
+        self._res_thumb_dir = None  # thumbnail directory of the open .res file
+        self._generation = 0  # bumped per opened file so stale decode results are dropped
+        self._pending = 0  # decode tasks still running on the thread pool
+        self._thread_pool = QThreadPool(self)  # decode all workers, owned so closing can cancel them
+        self._thread_pool.setMaxThreadCount(os.cpu_count() or 1)
+        self._decode_pool = threading.local()  # per-thread scratch buffers keyed by (w, h, depth)
+        # generic location, the app specific one is named after however the script was launched
+        cache_root = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+        self._thumb_cache_dir = Path(cache_root) / 'igi-tex'
         self.auto_fit = True
         self.console_visible = False  # Console vis flag
 
+        # collapses bursts of resize and wheel events into a single label resize
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(50)
+        self._resize_timer.timeout.connect(lambda: self.display_image_at_zoom(self.current_image))
+
         self.init_ui()
 
         # redirt stdout and stderr to onsole
@@ -69,9 +199,13 @@ class ImageViewer(QMainWindow):
         # layout creation
         self.main_layout = QHBoxLayout(self.central_widget)
 
+        # debug records are only formatted while the console is visible
+        log.setLevel(logging.DEBUG if self.console_visible else logging.WARNING)
+
         # list widget creation
         self.list_widget = QListWidget()
         self.list_widget.setFixedWidth(200)
+        self.list_widget.setIconSize(QSize(_THUMB_SIZE, _THUMB_SIZE))
         self.list_widget.itemSelectionChanged.connect(self.on_select)
         self.list_widget.itemDoubleClicked.connect(self.double_click)
         self.main_layout.addWidget(self.list_widget)
@@ -113,6 +247,9 @@ class ImageViewer(QMainWindow):
         open_action.setShortcut('Ctrl+O')
         open_action.triggered.connect(self.open_file)
         file_menu.addAction(open_action)
+        decode_all_action = QAction('Decode All', self)
+        decode_all_action.triggered.connect(self.decode_all)
+        file_menu.addAction(decode_all_action)
         file_menu.addSeparator()
         exit_action = QAction('Exit', self)
         exit_action.setShortcut('Esc')
@@ -133,149 +270,339 @@ class ImageViewer(QMainWindow):
             self.load_images(file_path)
 
     def load_images(self, file_path):
-        # image loading implementation
-        self.images = self.read_chunks(file_path)
+        # image loading implementation, only chunk descriptors are read here
+        self.close_resource()
+        self._image_offsets, self._image_names, self._image_sizes = self.read_chunks(file_path)
+        # extraction of filename from the name
+        names = [os.path.basename(name) if name else f'Image {i+1}'
+                 for i, name in enumerate(self._image_names)]
+
+        # one batch insert instead of a model signal round trip per item
+        self.list_widget.setUpdatesEnabled(False)
+        self.list_widget.blockSignals(True)
         self.list_widget.clear()
-        for i, (img, name, size_in_bytes) in enumerate(self.images):
-            # extraction of filename from the name
-            if name:
-                filename = os.path.basename(name)
-            else:
-                filename = f'Image {i+1}'
-            self.list_widget.addItem(filename)
-        if self.images:
+        self.list_widget.addItems(names)
+        for i in range(len(names)):
+            # thumbnails cached from an earlier session are shown without decoding
+            self.set_thumbnail_icon(i)
+        self.list_widget.blockSignals(False)
+        self.list_widget.setUpdatesEnabled(True)
+        if self._image_offsets:
+            # signals are live again, so this selection change runs update_image(0) via on_select
             self.list_widget.setCurrentRow(0)
-            self.update_image(0)
+
+    def close_resource(self):
+        # drop decoded pixmaps and unmap the previously opened .res file
+        # drop queued tasks, then wait only for the running ones, which hold slices of the mmap
+        self._thread_pool.clear()
+        self._thread_pool.waitForDone()
+        self._decode_pool = threading.local()  # frees every worker's scratch buffers
+        self._generation += 1
+        self._pending = 0
+        self.show_batch_progress()
+        self._decoded.clear()
+        self.current_image = None
+        self.current_index = -1
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
 
     def read_chunks(self, file_path):
-        images = []
+        # parallel lists of body offsets, names and sizes in bytes
+        offsets, names, sizes = [], [], []
         try:
             with open(file_path, 'rb') as file:
-                if file.readable() and file.seekable():
-                    try:
-                        magic, filesize, _, _, res_type = struct.unpack('IIIII', file.read(20))
-                        if magic != 0x46464C49:  # 'ILFF'
-                            print("Not a valid ILFF file.")
-                            return images  # not a valid file
-                    except struct.error:
-                        print("Failed to read the initial header, file may be corrupted or incomplete.")
-                        return images
-
-                    current_name = None  # to store the name associated with the next image
-                    while file.tell() < filesize + 4:
-                        try:
-                            start_address = file.tell()
-                            header = file.read(16)
-                            if len(header) < 16:
-                                print("Error reading chunk: Not enough data for header.")
-                                break
-                            chunk_type, buffer_size, _, chunk_size = struct.unpack('IIII', header)
-                            buffer = file.read(buffer_size)
-                            if len(buffer) < buffer_size:
-                                print("Error reading chunk: Not enough data for buffer.")
-                                break
-
-                            # process NAME chunk
-                            if chunk_type == 0x454D414E:  # 'NAME'
-                                # read the name string
-                                name = buffer.decode('utf-8', errors='ignore').strip('\x00')
-                                current_name = name
-                            elif chunk_type == 0x59444F42:  # 'BODY'
-                                image_data = self.parse_body_chunk(buffer, start_address, current_name)
-                                if image_data:
-                                    size_in_bytes = len(buffer)
-                                    images.append((image_data, current_name, size_in_bytes))
-                                current_name = None  # reset the name after associating it
-                            else:
-                                # might want to look into handling other chunk types here if needed..
-                                pass
-
-                            # align to next chunk properly
-                            file.seek((file.tell() + 3) & ~3)
-                        except struct.error as e:
-                            print(f"Error reading chunk: {e}. Possibly end of file reached unexpectedly.")
-                            break
-                else:
-                    print("File is not readable or seekable.")
+                stat = os.fstat(file.fileno())
+                mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
         except FileNotFoundError:
-            print(f"File '{file_path}' not found.")
-        return images
+            log.warning("File '%s' not found.", file_path)
+            return offsets, names, sizes
+        except ValueError:
+            # mmap refuses to map an empty file
+            log.warning("File '%s' is empty.", file_path)
+            return offsets, names, sizes
+
+        # the mmap keeps its own handle, the os pages the file in on demand
+        try:
+            magic, filesize, _, _, res_type = _FILE_HDR.unpack_from(mm, 0)
+            if magic != 0x46464C49:  # 'ILFF'
+                log.warning("Not a valid ILFF file.")
+                mm.close()
+                return offsets, names, sizes  # not a valid file
+        except struct.error:
+            log.warning("Failed to read the initial header, file may be corrupted or incomplete.")
+            mm.close()
+            return offsets, names, sizes
+
+        current_name = None  # to store the name associated with the next image
+        # chunks are walked by offset arithmetic alone, no tell/seek or per-chunk reads
+        offset = _FILE_HDR.size
+        while offset < filesize + 4:
+            try:
+                if offset + _CHUNK_HDR.size > len(mm):
+                    log.warning("Error reading chunk: Not enough data for header.")
+                    break
+                chunk_type, buffer_size, _, chunk_size = _CHUNK_HDR.unpack_from(mm, offset)
+                body = offset + _CHUNK_HDR.size
+                if body + buffer_size > len(mm):
+                    log.warning("Error reading chunk: Not enough data for buffer.")
+                    break
+
+                # process NAME chunk
+                if chunk_type == 0x454D414E:  # 'NAME'
+                    # read the name string
+                    name = mm[body:body + buffer_size].decode('utf-8', errors='ignore').strip('\x00')
+                    current_name = name
+                elif chunk_type == 0x59444F42:  # 'BODY'
+                    # decoding is deferred until the image is selected
+                    extension = os.path.splitext(current_name or '')[-1].lower()
+                    if extension in ('.tex', '.tga'):
+                        offsets.append(body)
+                        names.append(current_name)
+                        sizes.append(buffer_size)
+                    else:
+                        log.debug("Unsupported image format: %s. Skipping.", extension)
+                    current_name = None  # reset the name after associating it
+                else:
+                    # might want to look into handling other chunk types here if needed..
+                    pass
+
+                # align to next chunk properly
+                offset = (body + buffer_size + 3) & ~3
+            except struct.error as e:
+                log.warning("Error reading chunk: %s. Possibly end of file reached unexpectedly.", e)
+                break
+
+        self.prepare_thumbnail_dir(file_path, stat)
+        self._mm = mm
+        return offsets, names, sizes
+
+    def prepare_thumbnail_dir(self, file_path, stat):
+        # each .res gets its own thumbnail directory keyed on its path. the directory
+        # is emptied when the file's mtime or size changes, so rewritten files never
+        # show stale thumbnails or leave orphans behind
+        path_key = os.path.abspath(file_path).encode('utf-8', errors='surrogateescape')
+        self._res_thumb_dir = self._thumb_cache_dir / hashlib.sha1(path_key).hexdigest()
+        stamp = f'{stat.st_mtime_ns}|{stat.st_size}'
+        stamp_path = self._res_thumb_dir / 'stamp'
+        try:
+            if stamp_path.read_text() == stamp:
+                return
+        except OSError:
+            pass  # no stamp yet
+        try:
+            self._res_thumb_dir.mkdir(parents=True, exist_ok=True)
+            for old in self._res_thumb_dir.iterdir():
+                old.unlink()
+            stamp_path.write_text(stamp)
+        except OSError as e:
+            log.warning("Failed to reset thumbnail cache: %s", e)
+
+    def thumbnail_path(self, index):
+        ident = '|'.join(map(str, (
+            self._image_names[index], self._image_offsets[index], self._image_sizes[index]
+        )))
+        key = hashlib.sha1(ident.encode('utf-8', errors='surrogateescape')).hexdigest()
+        return self._res_thumb_dir / f'{key}.png'
+
+    def write_thumbnail(self, index, qimg):
+        # touches no widgets, safe to call from decode workers
+        thumb_path = self.thumbnail_path(index)
+        if thumb_path.exists():
+            return
+        try:
+            self._res_thumb_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            log.warning("Failed to cache thumbnail: %s", e)
+            return
+        # smooth transformation is bilinear, plenty at this size
+        thumb = qimg.scaled(_THUMB_SIZE, _THUMB_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        # the gui thread and a worker may write the same thumbnail, so each writes a
+        # private temp file and renames it into place
+        tmp_path = thumb_path.with_name(f'{thumb_path.name}.{threading.get_ident()}.tmp')
+        if not thumb.save(str(tmp_path), 'PNG'):
+            log.warning("Failed to cache thumbnail: %s", thumb_path)
+            return
+        try:
+            os.replace(tmp_path, thumb_path)
+        except OSError as e:
+            log.warning("Failed to cache thumbnail: %s", e)
+            tmp_path.unlink(missing_ok=True)
+
+    def set_thumbnail_icon(self, index):
+        thumb_path = self.thumbnail_path(index)
+        item = self.list_widget.item(index)
+        if item is not None and thumb_path.exists():
+            item.setIcon(QIcon(str(thumb_path)))
+
+    def decode_chunk(self, index, pooled=False):
+        # decodes texture index into a QImage, safe to call from decode workers.
+        # pooled reuses per-thread scratch buffers, meant for decode all batches
+        offset = self._image_offsets[index]
+        name = self._image_names[index]
+        size_in_bytes = self._image_sizes[index]
+        # slices must be released before the mmap can be closed
+        with memoryview(self._mm) as view, view[offset:offset + size_in_bytes] as buffer:
+            return self.parse_body_chunk(buffer, offset - _CHUNK_HDR.size, name, pooled)
+
+    def decode_image(self, index):
+        # returns the pixmap for texture index, decoding it on a cache miss
+        pixmap = self._decoded.get(index)
+        if pixmap is not None:
+            self._decoded.move_to_end(index)
+            return pixmap
+
+        self.status_bar.showMessage('Decoding\u2026')
+        self.status_bar.repaint()
+        qimg = self.decode_chunk(index)
+        self.show_batch_progress()  # puts back a running decode all message, if any
+        if qimg is None:
+            return None
+
+        pixmap = QPixmap.fromImage(qimg)
+        self.write_thumbnail(index, qimg)
+        self.set_thumbnail_icon(index)
+        self._decoded[index] = pixmap
+        if len(self._decoded) > _DECODE_CACHE_SIZE:
+            self._decoded.popitem(last=False)  # evict least recently viewed
+        return pixmap
+
+    def decode_all(self):
+        # decode every texture in parallel, one pool task per texture
+        if self._pending:
+            return  # a batch is already running
+        for index in range(len(self._image_offsets)):
+            if index in self._decoded:
+                continue
+            task = DecodeTask(self, self._generation, index)
+            task.signals.finished.connect(self.on_decoded)
+            self._pending += 1
+            self._thread_pool.start(task)
+        self.show_batch_progress()
+
+    def on_decoded(self, generation, index, qimg):
+        if generation != self._generation:
+            return  # result belongs to a file that has since been closed
+        self._pending -= 1
+        if not qimg.isNull():
+            # decode all keeps every pixmap resident until the file is closed, a later
+            # cache miss evicts one entry per insert so the cache never shrinks back
+            self._decoded[index] = QPixmap.fromImage(qimg)
+            self.set_thumbnail_icon(index)
+        self.show_batch_progress()
+
+    def show_batch_progress(self):
+        if self._pending:
+            self.status_bar.showMessage(f'Decoding {self._pending} textures\u2026')
+        else:
+            self.status_bar.clearMessage()
 
-    def parse_body_chunk(self, buffer, start_address, name):
+    def parse_body_chunk(self, buffer, start_address, name, pooled=False):
+        # buffer is a memoryview over the chunk payload, returns a QImage or None
         try:
             extension = os.path.splitext(name)[-1].lower()  # get file extension in lowercase
             if extension == '.tex':
                 # usual process for .tex files
-                header_format = 'IIIIIHHHHHH'
-                header_size = struct.calcsize(header_format)
-                header = struct.unpack(header_format, buffer[:header_size])
+                header_size = _TEX_HDR.size
+                header = _TEX_HDR.unpack_from(buffer, 0)
                 image_data = buffer[header_size:]
                 width, height = header[6], header[7]  # width_1, height_1 are likely the actual image dimensions
 
-                # print header values and start address for debugging
-                print(f"Start Address: {start_address}, Image Header Values: {header}")
+                # header values and start address for debugging, formatted only when enabled
+                log.debug("Start Address: %d, Image Header Values: %s", start_address, header)
 
                 if width > 8000 or height > 8000:
-                    print(f"Unusually large image dimensions: {width}x{height}. Skipping.")
+                    log.warning("Unusually large image dimensions: %dx%d. Skipping.", width, height)
                     return None
                 if len(image_data) < width * height * 4:
-                    print(f"Not enough data for an image {width}x{height}.")
+                    log.warning("Not enough data for an image %dx%d.", width, height)
                     return None
 
-                # handle BGR img data
-                image = Image.frombytes('RGBA', (width, height), image_data, 'raw', 'BGRA')
-                return image
+                return self.bgra_to_qimage(image_data, width, height)
             elif extension == '.tga':
                 # read TGA img data directly
-                return self.read_tga_image(buffer)
+                return self.read_tga_image(buffer, pooled)
             else:
-                print(f"Unsupported image format: {extension}. Skipping.")
+                log.warning("Unsupported image format: %s. Skipping.", extension)
                 return None
         except Exception as e:
-            print(f"Error parsing image chunk: {e}")
+            log.warning("Error parsing image chunk: %s", e)
             return None
 
-    def read_tga_image(self, buffer):
-        """Reads TGA image data from a raw buffer."""
+    def read_tga_image(self, buffer, pooled=False):
+        """Reads TGA image data from a raw buffer (bytes or memoryview) into a QImage."""
         # tga header
-        header_size = 18  # tga header size
+        header_size = _TGA_HDR.size
         if len(buffer) < header_size:
-            print("Buffer too small to contain TGA header.")
+            log.warning("Buffer too small to contain TGA header.")
             return None
 
-        header = buffer[:header_size]
-        width = header[12] + (header[13] << 8)  # width in pixels
-        height = header[14] + (header[15] << 8)  # height in pixels
-        pixel_depth = header[16]  # bits per pixel
+        # width, height in pixels and bits per pixel, same layout write_tga packs
+        *_, width, height, pixel_depth, _ = _TGA_HDR.unpack_from(buffer, 0)
         image_data_offset = header_size  # image data starts right after the header!
 
         if pixel_depth == 32:
             # create a new img from the tga data with 32bpp
             image_data = buffer[image_data_offset:]
             if len(image_data) < width * height * 4:
-                print(f"Not enough data for image dimensions: {width}x{height}.")
+                log.warning("Not enough data for image dimensions: %dx%d.", width, height)
                 return None
-            image = Image.frombuffer('RGBA', (width, height), image_data, 'raw', 'BGRA', 0, 1)
-            return image
+            return self.bgra_to_qimage(image_data, width, height)
         elif pixel_depth == 24:
             # create a new img from the tga data with 24bpp
             image_data = buffer[image_data_offset:]
             if len(image_data) < width * height * 3:
-                print(f"Not enough data for image dimensions: {width}x{height}.")
+                log.warning("Not enough data for image dimensions: %dx%d.", width, height)
                 return None
-            # Convert to RGBA
-            rgba_data = bytearray()
-            for i in range(0, len(image_data), 3):
-                rgba_data.extend(image_data[i:i+3])  # add RGB
-                rgba_data.extend(b'\xFF')  # add alpha (consider argb)
-
-            # convert bytearray to bytes for pil
-            image = Image.frombuffer('RGBA', (width, height), bytes(rgba_data), 'raw', 'BGRA', 0, 1)
-            return image
+            if pooled:
+                rgba = self.scratch_buffer(width, height, pixel_depth)
+            else:
+                rgba = np.empty(width * height * 4, dtype=np.uint8)
+            if _expand_bgr_to_bgra is not None:
+                # numba kernel writes the interleaved BGRA bytes directly
+                src = np.frombuffer(image_data, dtype=np.uint8, count=width * height * 3)
+                _expand_bgr_to_bgra(src, rgba)
+            else:
+                # expand BGR to BGRA in one vectorized store, alpha preset to opaque
+                rgb = np.frombuffer(image_data, dtype=np.uint8, count=width * height * 3).reshape(-1, 3)
+                pixels = rgba.reshape(-1, 4)
+                pixels[:, :3] = rgb
+                pixels[:, 3] = 255
+
+            # tga stores BGR, so the expanded buffer is already BGRA and needs no swizzle
+            return self.bgra_to_qimage(rgba.data, width, height)
         else:
-            print(f"Unsupported pixel depth: {pixel_depth}. Only 24bpp and 32bpp TGA are supported.")
+            log.warning("Unsupported pixel depth: %d. Only 24bpp and 32bpp TGA are supported.", pixel_depth)
             return None
 
+    def scratch_buffer(self, width, height, depth):
+        # reuses one BGRA buffer per texture size on the calling thread, so batches of
+        # same sized textures don't reallocate. callers must copy out before returning
+        nbytes = width * height * 4
+        if nbytes > _DECODE_POOL_BYTES:
+            return np.empty(nbytes, dtype=np.uint8)  # too big to keep around
+        buffers = getattr(self._decode_pool, 'buffers', None)
+        if buffers is None:
+            buffers = self._decode_pool.buffers = {}
+        key = (width, height, depth)
+        buf = buffers.get(key)
+        if buf is None:
+            if sum(b.nbytes for b in buffers.values()) + nbytes > _DECODE_POOL_BYTES:
+                buffers.clear()
+            buf = buffers[key] = np.empty(nbytes, dtype=np.uint8)
+        return buf
+
+    def bgra_to_qimage(self, data, width, height):
+        # ARGB32 on little-endian is BGRA in memory, so the texels are copied straight
+        # into an owned QImage without a swizzle pass. data may be an mmap slice
+        # or a scratch buffer, neither outlives this call. np.copyto releases the gil
+        # for the bulk copy, a memoryview slice assignment would not
+        pixel_count = width * height * 4
+        qimg = QImage(width, height, QImage.Format_ARGB32)
+        dst = np.frombuffer(qimg.bits(), dtype=np.uint8, count=pixel_count)
+        np.copyto(dst, np.frombuffer(data, dtype=np.uint8, count=pixel_count))
+        return qimg
+
     def on_select(self):
         selected_items = self.list_widget.selectedItems()
         if selected_items:
@@ -283,11 +610,19 @@ class ImageViewer(QMainWindow):
             self.update_image(index)
 
     def update_image(self, selected_index):
-        if 0 <= selected_index < len(self.images):
-            self.current_image = self.images[selected_index][0]  # pil img
-            self.current_image_name = self.images[selected_index][1]
-            self.current_image_size = self.images[selected_index][2]
+        if 0 <= selected_index < len(self._image_offsets):
+            self.current_image = self.decode_image(selected_index)
+            self.current_index = selected_index
+            self.current_image_name = self._image_names[selected_index]
+            self.current_image_size = self._image_sizes[selected_index]
             self.zoom_level = 1.0  # rset zoom level
+            if self.current_image is None:
+                self.image_label.clear()
+                self.update_image_info()
+                return
+            # the source pixmap is set once, zooming only resizes the label and
+            # scaledContents lets qt scale it while painting
+            self.image_label.setPixmap(self.current_image)
             self.display_image_at_zoom(self.current_image)
 
     def display_image_at_zoom(self, image):
@@ -301,7 +636,7 @@ class ImageViewer(QMainWindow):
         # resize according to zoom level or fit to window
         if self.auto_fit:
             # fit img to window while maintaining aspect ratio
-            aspect_ratio = image.width / image.height
+            aspect_ratio = image.width() / image.height()
             new_width = frame_width
             new_height = int(frame_width / aspect_ratio)
 
@@ -310,17 +645,9 @@ class ImageViewer(QMainWindow):
                 new_width = int(frame_height * aspect_ratio)
         else:
             # resize based on zoom level
-            new_width = int(image.width * self.zoom_level)
-            new_height = int(image.height * self.zoom_level)
-
-        # resize the pil img
-        resized_image = image.resize((new_width, new_height), Image.LANCZOS)
+            new_width = int(image.width() * self.zoom_level)
+            new_height = int(image.height() * self.zoom_level)
 
-        # convert pil img to QPixmap
-        qim = ImageQt(resized_image)
-        pixmap = QPixmap.fromImage(qim)
-
-        self.image_label.setPixmap(pixmap)
         self.image_label.resize(new_width, new_height)
 
         # update image info label
@@ -328,7 +655,7 @@ class ImageViewer(QMainWindow):
 
     def update_image_info(self):
         if self.current_image is not None:
-            width, height = self.current_image.width, self.current_image.height
+            width, height = self.current_image.width(), self.current_image.height()
             size_in_bytes = self.current_image_size
             size_in_kb = size_in_bytes / 1024
             info_text = f"{width} x {height} px\n{size_in_kb:.2f} KB"
@@ -352,8 +679,8 @@ class ImageViewer(QMainWindow):
         # ensuring the zoom level remains within reasonable bounds
         self.zoom_level = max(0.1, min(10.0, self.zoom_level))
 
-        # update the img display
-        self.display_image_at_zoom(self.current_image)
+        # update the img display once the wheel burst settles
+        self._resize_timer.start()
 
     def toggle_auto_fit(self):
         self.auto_fit = self.auto_fit_checkbox.isChecked()
@@ -362,32 +689,51 @@ class ImageViewer(QMainWindow):
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if self.auto_fit:
-            self.display_image_at_zoom(self.current_image)
+            self._resize_timer.start()
 
     def double_click(self, item):
-        index = self.list_widget.row(item)
-        image = self.images[index][0]
-        self.save_image_as_tga(image)
+        self.save_image_as_tga(self.list_widget.row(item))
 
     def double_click_image(self, event):
         if self.current_image is not None:
-            self.save_image_as_tga(self.current_image)
+            self.save_image_as_tga(self.current_index)
 
-    def save_image_as_tga(self, image):
-        if image is not None:
+    def save_image_as_tga(self, index):
+        # exports re-decode the chunk, the display pixmap is premultiplied and would
+        # lose the colour of transparent texels
+        qimg = self.decode_chunk(index) if 0 <= index < len(self._image_offsets) else None
+        if qimg is not None:
             # extract the base filename and replace extension with .tga
             default_name = 'image.tga'  # default name
-            if self.current_image_name:
-                default_name = os.path.splitext(os.path.basename(self.current_image_name))[0] + '.tga'
+            if self._image_names[index]:
+                default_name = os.path.splitext(os.path.basename(self._image_names[index]))[0] + '.tga'
 
             options = QFileDialog.Options()
             tga_filename, _ = QFileDialog.getSaveFileName(
                 self, "Save Image As", default_name, "TGA Files (*.tga)", options=options
             )
             if tga_filename:
-                image.save(tga_filename, format='TGA')
+                try:
+                    self.write_tga(tga_filename, qimg)
+                except OSError as e:
+                    QMessageBox.warning(self, "Save Failed", f"Could not save {tga_filename}: {e}")
+                    return
                 QMessageBox.information(self, "Image Saved", f"Image saved as: {tga_filename}")
 
+    def write_tga(self, tga_filename, qimg):
+        # uncompressed 32bpp tga, qimg is a straight (not premultiplied) ARGB32 image
+        # from decode_chunk, its scanlines are the source BGRA texels and go to disk as is
+        width, height = qimg.width(), qimg.height()
+        header = _TGA_HDR.pack(
+            0, 0, 2,  # no id field, no colour map, uncompressed true-colour
+            0, 0, 0,  # colour map spec
+            0, 0, width, height,
+            32, 0x28  # 8 alpha bits, top-left origin
+        )
+        with open(tga_filename, 'wb') as file:
+            file.write(header)
+            file.write(qimg.constBits()[:width * height * 4])
+
     def toggle_console(self):
         if self.console_visible:
             self.close_console()
@@ -399,8 +745,9 @@ class ImageViewer(QMainWindow):
             # create the console widget
             self.console = QDockWidget("Debug Console", self)
             self.console.setAllowedAreas(Qt.BottomDockWidgetArea)
-            self.console_widget = QTextEdit()
+            self.console_widget = QPlainTextEdit()
             self.console_widget.setReadOnly(True)
+            self.console_widget.setMaximumBlockCount(5000)  # oldest lines are dropped past this
 
             # setting monospace font for the console widget
             font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
@@ -418,6 +765,10 @@ class ImageViewer(QMainWindow):
             sys.stdout = self.stdout_stream
             sys.stderr = self.stderr_stream
 
+            self.log_handler = QtLogHandler(self.stdout_stream)
+
+        log.addHandler(self.log_handler)
+        log.setLevel(logging.DEBUG)
         self.console.show()
         self.console_visible = True
 
@@ -430,14 +781,20 @@ class ImageViewer(QMainWindow):
             sys.stdout = self.sys_stdout
             sys.stderr = self.sys_stderr
 
+            log.removeHandler(self.log_handler)
+            log.setLevel(logging.WARNING)
+
     def write_console(self, text):
-        self.console_widget.insertPlainText(text)
-        self.console_widget.ensureCursorVisible()
+        # text is a batch of writes, appendPlainText starts its own line so drop the trailing newline
+        self.console_widget.appendPlainText(text.rstrip('\n'))
+        scroll_bar = self.console_widget.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
 
     def closeEvent(self, event):
         # restore stdout and stderr
         sys.stdout = self.sys_stdout
         sys.stderr = self.sys_stderr
+        self.close_resource()
         event.accept()
 
 